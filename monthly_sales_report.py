@@ -1,10 +1,50 @@
+import datetime
+import hashlib
 import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
 import pandas as pd
 from dbfread import DBF
 
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:  # optional: fall back to pandas' CSV writer
+    pa = None
+
 LOCAL_UNZIPPED_BASE = "/tmp/extracted/6045/Data"  # Hard-coded path for single-store test
 REPORT_PATH = "./reports/monthly_sales_report.csv"
 
+# (store_id, folder_path) pairs to report on; a single store for now
+STORE_FOLDERS = [("6045", LOCAL_UNZIPPED_BASE)]
+
+# Report schema; every store's result (empty or not) uses these columns and dtypes
+EMPTY_REPORT = pd.DataFrame({
+    "Astoreid": pd.Series(dtype="string"),
+    "Storename": pd.Series(dtype="string"),
+    "date": pd.Series(dtype="string"),
+    "Type": pd.Series(dtype="string"),
+    "sale_amount": pd.Series(dtype="float64"),
+    "sale_count": pd.Series(dtype="int64"),
+    "currency": pd.Series(dtype="string"),
+})
+
+# NumPy dtype per DBF field type; anything not listed stays as Python objects
+DBF_FIELD_DTYPES = {
+    "N": np.float64,
+    "F": np.float64,
+    "D": "datetime64[D]",
+}
+
+# DBF field types with a fixed-width text encoding that read_dbf_mmap can decode
+MMAP_FIELD_TYPES = "CNFDL"
+
+# jnl.dbf fields process_store_data uses; only these are decoded and cached
+JNL_COLUMNS = ("Line", "Price", "Descript", "Date")
+
 
 def process_dbf_in_chunks(dbf_path, chunk_size=10000):
     # Accumulate partial results in smaller DataFrames or direct to CSV
@@ -35,76 +75,314 @@ def process_dbf_in_chunks(dbf_path, chunk_size=10000):
     return final_df
 
 
-def find_dbf_filename(folder_path, base_name):
+def list_dbf_files(folder_path):
+    """
+    Lists `folder_path` once and returns {lowercased name: actual name},
+    so several case-insensitive lookups can share one directory read.
+    Only regular files are listed; os.scandir reports the file type with
+    the directory entries, so no extra stat() per file is needed.
+    Returns an empty dict if the folder does not exist.
+    """
+    try:
+        with os.scandir(folder_path) as entries:
+            return {entry.name.lower(): entry.name for entry in entries if entry.is_file()}
+    except OSError:
+        return {}
+
+def find_dbf_filename(folder_path, base_name, dbf_files=None):
     """
     Searches `folder_path` for a file whose name (ignoring case)
     matches `base_name + ".dbf"`.
     e.g. if base_name="str", we look for "str.dbf" in any case: STR.DBF, sTr.Dbf, etc.
+    Pass `dbf_files` (from list_dbf_files) to reuse an earlier listing.
 
     Returns the actual file name if found (e.g. "STR.DBF"), else None.
     """
-    target = (base_name + ".dbf").lower()
-    if not os.path.isdir(folder_path):
-        return None
+    if dbf_files is None:
+        dbf_files = list_dbf_files(folder_path)
+    return dbf_files.get((base_name + ".dbf").lower())  # e.g. "STR.DBF"
 
-    for fname in os.listdir(folder_path):
-        if fname.lower() == target:
-            return fname  # e.g. "STR.DBF"
+def dbf_cache_path(dbf_path, columns=None):
+    """
+    Path of the Parquet cache next to `dbf_path`: `<dbf>.parquet` for the
+    whole table, or `<dbf>.<key>.parquet` when only `columns` are read, with
+    a key derived from the column names (ignoring case and order).
+    """
+    if columns is None:
+        return dbf_path + ".parquet"
+    names = ",".join(sorted({col.lower() for col in columns}))
+    return f"{dbf_path}.{hashlib.sha1(names.encode()).hexdigest()[:12]}.parquet"
+
+def fresh_dbf_cache(dbf_path, columns=None):
+    """
+    Returns the path of the Parquet cache for `dbf_path` and `columns`
+    (see dbf_cache_path) if pyarrow is installed and the cache is at least
+    as new as the DBF, else None.
+    """
+    cache_path = dbf_cache_path(dbf_path, columns)
+    if pa is not None and os.path.isfile(cache_path) \
+            and os.path.getmtime(cache_path) >= os.path.getmtime(dbf_path):
+        return cache_path
     return None
 
-def read_dbf_to_df(folder_path, base_name):
+def prefetch_dbf(folder_path, base_name, dbf_files=None, columns=None):
+    """
+    Asks the kernel to start reading `base_name`.dbf (any case) into the
+    page cache in the background (posix_fadvise WILLNEED), so the file is
+    read ahead while the caller does other work before parsing it.
+    Does nothing if the file is missing, already has a fresh Parquet cache
+    for `columns` (it will not be parsed) or the platform lacks posix_fadvise.
+    """
+    dbf_file = find_dbf_filename(folder_path, base_name, dbf_files)
+    if not dbf_file or not hasattr(os, "posix_fadvise"):
+        return
+
+    dbf_path = os.path.join(folder_path, dbf_file)
+    if fresh_dbf_cache(dbf_path, columns):
+        return
+
+    try:
+        fd = os.open(dbf_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+def read_dbf_to_df(folder_path, base_name, dbf_files=None, columns=None):
     """
     Combines find_dbf_filename + dbfread to read the DBF, ignoring case.
+    Tables made only of fixed-width fields are memory-mapped (read_dbf_mmap);
+    anything else goes through dbfread's record iterator (read_dbf_records).
+    If `columns` is given, only the fields whose names match one of them
+    (ignoring case) are decoded and returned.
+    When pyarrow is installed the decoded fields are cached next to the DBF
+    (see dbf_cache_path) and reused for as long as the cache is newer than
+    the DBF. Each set of `columns` has its own cache, so a miss still only
+    decodes the requested fields.
     Returns a DataFrame (empty if file not found).
     """
-    dbf_file = find_dbf_filename(folder_path, base_name)
+    dbf_file = find_dbf_filename(folder_path, base_name, dbf_files)
     if not dbf_file:
         print(f"Warning: Could not find {base_name}.dbf (any case) in {folder_path}")
         return pd.DataFrame()
 
     dbf_path = os.path.join(folder_path, dbf_file)
-    if not os.path.isfile(dbf_path):
-        print(f"Warning: DBF file missing: {dbf_path}")
-        return pd.DataFrame()
 
-    table = DBF(dbf_path, load=True)
-    return pd.DataFrame(iter(table))
+    # load=False only parses the header and field descriptors
+    table = DBF(dbf_path, load=False, recfactory=None)
+    field_names = table.field_names
+    if columns is not None:
+        wanted = {col.lower() for col in columns}
+        field_names = [name for name in field_names if name.lower() in wanted]
+
+    cache_path = dbf_cache_path(dbf_path, columns)
+    if fresh_dbf_cache(dbf_path, columns):
+        try:
+            return pd.read_parquet(cache_path, engine="pyarrow")
+        except Exception as e:
+            print(f"Warning: Could not read DBF cache {cache_path}, reparsing: {e}")
+
+    if all(field.type in MMAP_FIELD_TYPES for field in table.fields):
+        df = read_dbf_mmap(table, field_names)
+    else:
+        df = read_dbf_records(table, field_names)
+
+    if pa is not None:
+        # Write to a uniquely named file beside the cache and rename it into
+        # place, so a crashed or concurrent writer never leaves a truncated cache
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".parquet")
+            with os.fdopen(fd, "wb") as f:
+                df.to_parquet(f, engine="pyarrow", compression="zstd", index=False)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"Warning: Could not write DBF cache {cache_path}: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return df
+
+def read_first_field(folder_path, base_name, field_name, dbf_files=None):
+    """
+    Returns `field_name` from the first record of `base_name`.dbf (any case),
+    streaming just that record instead of loading the table.
+    Returns None if the file, the field, or any record is missing.
+    """
+    dbf_file = find_dbf_filename(folder_path, base_name, dbf_files)
+    if not dbf_file:
+        print(f"Warning: Could not find {base_name}.dbf (any case) in {folder_path}")
+        return None
+
+    try:
+        for rec in DBF(os.path.join(folder_path, dbf_file), load=False):
+            return rec.get(field_name)
+    except Exception as e:
+        print(f"Warning: Error reading {base_name}.dbf in {folder_path}: {e}")
+    return None
+
+def read_dbf_records(table, field_names=None):
+    """
+    Parses the records of a dbfread table column by column into typed
+    NumPy arrays (see DBF_FIELD_DTYPES) instead of building a dict per record.
+    Only the fields in `field_names` (default: all) are kept.
+    """
+    if field_names is None:
+        field_names = table.field_names
+    keep = [i for i, field in enumerate(table.fields) if field.name in field_names]
+    columns = [[] for _ in keep]
+    appends = [col.append for col in columns]
+    for record in table:
+        for i, append in zip(keep, appends):
+            append(record[i][1])
+
+    data = {}
+    for i, values in zip(keep, columns):
+        field = table.fields[i]
+        data[field.name] = np.array(values, dtype=DBF_FIELD_DTYPES.get(field.type, object))
+    return pd.DataFrame(data, copy=False)
+
+def read_dbf_mmap(table, field_names=None):
+    """
+    Memory-maps the fixed-width records of a dbfread table as a NumPy
+    structured array and decodes each field with vectorized ops, so no
+    Python object is created per record. Deleted records are skipped and
+    values match what dbfread would return (N/F as float64, D as datetime64[D]),
+    including its ValueError on dates and logicals it cannot parse.
+    Only the fields in `field_names` (default: all) are decoded.
+    """
+    if field_names is None:
+        field_names = table.field_names
+    names = [f"f{i}" for i in range(len(table.fields))]
+    offsets = np.cumsum([1] + [field.length for field in table.fields])
+    record_dtype = np.dtype({
+        "names": ["deleted"] + names,
+        "formats": ["S1"] + [f"S{field.length}" for field in table.fields],
+        "offsets": [0] + offsets[:-1].tolist(),
+        "itemsize": table.header.recordlen,
+    })
+
+    data_len = os.path.getsize(table.filename) - table.header.headerlen
+    num_records = max(data_len, 0) // table.header.recordlen
+    if num_records == 0:
+        return pd.DataFrame(columns=[name for name in table.field_names if name in field_names])
+
+    records = np.memmap(table.filename, dtype=record_dtype, mode="r",
+                        offset=table.header.headerlen, shape=(num_records,))
+
+    # Records end at the first EOF marker, like dbfread's iterator
+    flags = records["deleted"]
+    eof = np.flatnonzero(flags == b"\x1a")
+    live = flags == b" "
+    if len(eof):
+        live[eof[0]:] = False
+
+    data = {}
+    for name, field in zip(names, table.fields):
+        if field.name not in field_names:
+            continue
+        raw = records[name][live]
+        if field.type == "C":
+            values = np.char.decode(np.char.rstrip(raw, b"\0 "), table.encoding)
+            values = values.astype(object)
+        elif field.type in "NF":
+            values = np.char.strip(np.char.strip(raw), b"*")
+            values = np.char.replace(values, b",", b".")
+            values = np.where(values == b"", b"nan", values).astype(np.float64)
+        elif field.type == "D":
+            values = pd.to_datetime(np.char.decode(raw, "latin-1"), format="%Y%m%d", errors="coerce")
+            values = values.to_numpy().astype("datetime64[D]")
+            # Like dbfread, only dates made of spaces/zeros are null; retry the
+            # rest of the misses the way dbfread parses them, or reject them
+            raw_bytes = raw.view(np.uint8).reshape(len(raw), field.length)
+            blank = np.isin(raw_bytes, list(b" 0")).all(axis=1)
+            for i in np.flatnonzero(np.isnat(values) & ~blank):
+                value = raw_bytes[i].tobytes()
+                try:
+                    values[i] = datetime.date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+                except ValueError:
+                    raise ValueError(f"invalid date {value!r}") from None
+        else:  # "L"
+            codes = raw.view(np.uint8)
+            invalid = ~np.isin(codes, list(b"TtYyFfNn? "))
+            if invalid.any():
+                value = codes[invalid][:1].tobytes()
+                raise ValueError(f"Illegal value for logical field: {value!r}")
+            values = np.full(len(raw), None, dtype=object)
+            values[np.isin(codes, list(b"TtYy"))] = True
+            values[np.isin(codes, list(b"FfNn"))] = False
+        data[field.name] = values
+
+    del records
+    return pd.DataFrame(data, copy=False)
+
+def normalize_columns(df, target_names):
+    """
+    For each name in target_names, if df has a column whose .lower() matches
+    it, rename that column to exactly the target name (one rename for all).
+    Returns the set of target names that were found.
+    """
+    col_map = {col.lower(): col for col in df.columns}
+    renames = {
+        col_map[name.lower()]: name
+        for name in target_names
+        if name.lower() in col_map
+    }
+    df.rename(columns=renames, inplace=True)
+    return set(renames.values())
+
+def as_numeric(values):
+    """
+    Returns the Series `values` unchanged if it is already numeric,
+    else pd.to_numeric(values, errors="coerce").
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values
+    return pd.to_numeric(values, errors="coerce")
 
-def normalize_column(df, target_name):
+def is_yyyymmdd(values):
     """
-    If df has a column whose .lower() matches target_name.lower(),
-    rename it to exactly target_name and return True. Else return False.
+    True if every non-null entry of the Series `values` is an 8-digit
+    "YYYYMMDD" string (how DBF date fields look when stored as text).
     """
-    for col in df.columns:
-        if col.lower() == target_name.lower():
-            df.rename(columns={col: target_name}, inplace=True)
-            return True
-    return False
+    values = values.dropna()
+    return (
+        pd.api.types.is_string_dtype(values)
+        and (values.str.len() == 8).all()
+        and values.str.isdigit().all()
+    )
 
-def process_store_data(store_id, folder_path):
+def process_store_data(store_id, folder_path, month_prefix=None):
     """
     Reads str.dbf and jnl.dbf (case-insensitive) from folder_path.
-    Merges line 950/980 pairs by date + Type, returns a DataFrame with:
+    Merges line 950/980 pairs by date + Type (only pairs whose YYYY-MM-DD
+    date starts with `month_prefix`, if given), returns a DataFrame with:
       [Astoreid, Storename, date, Type, sale_amount, sale_count, currency]
     """
-    df_str = read_dbf_to_df(folder_path, "str")
-    df_jnl = read_dbf_to_df(folder_path, "jnl")
+    # One directory listing serves every DBF lookup for this store
+    dbf_files = list_dbf_files(folder_path)
 
-    # Store name
-    if not df_str.empty and "NAME" in df_str.columns:
-        store_name = str(df_str.iloc[0]["NAME"])
-    else:
-        store_name = store_id
+    # Start fetching jnl.dbf while str.dbf is read; str.dbf only needs its
+    # first record, so prefetching the whole file would be wasted I/O
+    prefetch_dbf(folder_path, "jnl", dbf_files, columns=JNL_COLUMNS)
+
+    # Store name: only the first str.dbf record is needed
+    store_name = read_first_field(folder_path, "str", "NAME", dbf_files)
+    store_name = str(store_name) if store_name else store_id
+
+    df_jnl = read_dbf_to_df(folder_path, "jnl", dbf_files, columns=JNL_COLUMNS)
 
     if df_jnl.empty:
         print(f"Warning: No jnl data for store {store_id}.")
-        return pd.DataFrame(columns=["Astoreid","Storename","date","Type","sale_amount","sale_count","currency"])
+        return EMPTY_REPORT.copy()
 
     # Normalize columns: "Line", "Price", "Descript", "Date"
-    found_line     = normalize_column(df_jnl, "Line")
-    found_price    = normalize_column(df_jnl, "Price")
-    found_descript = normalize_column(df_jnl, "Descript")
-    found_date     = normalize_column(df_jnl, "Date")
+    found = normalize_columns(df_jnl, JNL_COLUMNS)
+    found_line     = "Line" in found
+    found_price    = "Price" in found
+    found_descript = "Descript" in found
+    found_date     = "Date" in found
 
     # Create fallback columns if missing
     if not found_line:
@@ -120,91 +398,154 @@ def process_store_data(store_id, folder_path):
         print(f"Warning: 'Date' column missing for store {store_id}. {df_jnl.columns.tolist()}")
         df_jnl["Date"] = None
 
-    # Convert "Line" to string, "Price" to numeric
-    df_jnl["Line"]  = df_jnl["Line"].astype(str)
-    df_jnl["Price"] = pd.to_numeric(df_jnl["Price"], errors="coerce").fillna(0)
+    # Encode "Line" as int16 codes (-1 if not a whole line number in range,
+    # so 950.5 cannot truncate to 950).
+    # N/F fields already come back from the DBF readers as float64, so the
+    # per-value to_numeric coercion (here and for "Price") only runs for
+    # text or missing columns.
+    line_num = as_numeric(df_jnl["Line"])
+    df_jnl["Line"]  = line_num.where((line_num.abs() < 2**15) & (line_num == line_num.round()), -1).astype(np.int16)
+
+    # Only the rows of a consecutive (950->980) pair matter from here on, so
+    # drop the rest before converting Price and Date. Both ends of each pair
+    # are kept, which keeps them adjacent; keeping every 950/980 line instead
+    # would pair lines that had other lines between them.
+    line = df_jnl["Line"].to_numpy()
+    starts = (line[:-1] == 950) & (line[1:] == 980)
+    keep = np.zeros(len(line), dtype=bool)
+    keep[:-1] |= starts
+    keep[1:] |= starts
+    df_jnl = df_jnl.loc[keep].reset_index(drop=True)
+
+    # Prices are summed as int64 cents for exact sums (int32 would wrap at
+    # $21,474,836.48); they are converted back to dollars after grouping
+    df_jnl["Price"] = (as_numeric(df_jnl["Price"]).fillna(0) * 100).round().astype(np.int64)
 
     # Convert date to YYYY-MM-DD if possible
-    if df_jnl["Date"].notnull().any():
+    dates = df_jnl["Date"]
+    if dates.isnull().all():
+        df_jnl["Date"] = None
+    elif is_yyyymmdd(dates):
+        # Character date fields already hold "YYYYMMDD": just insert the dashes
+        df_jnl["Date"] = dates.str[:4] + "-" + dates.str[4:6] + "-" + dates.str[6:8]
+    else:
         try:
-            df_jnl["Date"] = pd.to_datetime(df_jnl["Date"]).dt.strftime("%Y-%m-%d")
+            # NumPy's C ISO formatter instead of a strftime call per row
+            days = pd.to_datetime(dates).to_numpy().astype("datetime64[D]")
+            df_jnl["Date"] = np.where(np.isnat(days), None, days.astype(str))
         except Exception as e:
             print(f"Warning: Error converting date for store {store_id}: {e}")
-            df_jnl["Date"] = df_jnl["Date"].astype(str)
-    else:
-        df_jnl["Date"] = None
-
-    # Keep the row order
-    df_jnl.reset_index(drop=False, inplace=True)
+            df_jnl["Date"] = dates.astype(str)
 
     # Build pairs from consecutive (950->980) lines
-    pairs = []
-    for i in range(len(df_jnl) - 1):
-        line_val = df_jnl.loc[i,   "Line"]
-        price_val= df_jnl.loc[i,   "Price"]
-        date_val = df_jnl.loc[i,   "Date"]
-        line_next= df_jnl.loc[i+1, "Line"]
-        desc_next= df_jnl.loc[i+1, "Descript"]
-
-        if line_val == "950" and line_next == "980":
-            pairs.append({
-                "date": date_val,
-                "Type": desc_next,
-                "sale_amount": price_val,
-                "sale_count": 1
-            })
-
-    df_pairs = pd.DataFrame(pairs)
-    if df_pairs.empty:
-        print(f"Warning: No (950->980) pairs found for store {store_id}.")
-        return pd.DataFrame(columns=["Astoreid","Storename","date","Type","sale_amount","sale_count","currency"])
+    line  = df_jnl["Line"].to_numpy()
+    price = df_jnl["Price"].to_numpy()
+    date  = df_jnl["Date"].to_numpy()
+    desc  = df_jnl["Descript"].to_numpy()
+    mask  = (line[:-1] == 950) & (line[1:] == 980)
 
-    # Group by (date, Type)
+    if not mask.any():
+        print(f"Warning: No (950->980) pairs found for store {store_id}.")
+        return EMPTY_REPORT.copy()
+
+    # Optional: keep only pairs from the requested month, before grouping.
+    # Filtering jnl rows up front would make unrelated 950/980 lines adjacent.
+    if month_prefix:
+        pair_idx = np.flatnonzero(mask)
+        in_month = pd.Series(date[pair_idx]).astype(str).str.startswith(month_prefix).to_numpy()
+        mask[pair_idx[~in_month]] = False
+        if not mask.any():
+            return EMPTY_REPORT.copy()
+
+    # Group the pairs by (date, Type) straight from the masked arrays,
+    # without materializing an intermediate pairs DataFrame. Categorical
+    # keys let the groupby hash small integer codes instead of strings.
+    keys = [
+        pd.CategoricalIndex(date[:-1][mask], name="date"),
+        pd.CategoricalIndex(desc[1:][mask], name="Type"),
+    ]
     grouped = (
-        df_pairs
-        .groupby(["date","Type"], dropna=False)
-        .agg(
-            sale_amount=("sale_amount","sum"),
-            sale_count=("sale_count","sum")
-        )
+        pd.Series(price[:-1][mask])
+        .groupby(keys, dropna=False, observed=True)
+        .agg(sale_amount="sum", sale_count="size")
         .reset_index()
     )
 
+    grouped["sale_amount"] = grouped["sale_amount"] / 100
+
     # Insert store metadata
     grouped.insert(0, "Astoreid", store_id)
     grouped.insert(1, "Storename", store_name)
     grouped["currency"] = "USD"
 
-    # Final columns
-    expected = ["Astoreid","Storename","date","Type","sale_amount","sale_count","currency"]
-    for col in expected:
-        if col not in grouped.columns:
-            grouped[col] = None
-    grouped = grouped[expected]
-    return grouped
+    # Final columns, with the same dtypes for every store
+    return grouped.reindex(columns=EMPTY_REPORT.columns).astype(EMPTY_REPORT.dtypes.to_dict())
 
-def main():
-    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+def write_report_csv(df, dest, header=True):
+    """
+    Writes `df` as CSV (no index) to `dest`, a path or a binary file
+    object; `header=False` appends rows only. Uses pyarrow's native CSV
+    writer when pyarrow is installed, DataFrame.to_csv otherwise.
+    """
+    if pa is None:
+        df.to_csv(dest, index=False, header=header)
+        return
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Format rows in larger batches than pyarrow's default of 1024
+    write_options = pacsv.WriteOptions(include_header=header, batch_size=64 * 1024)
+    pacsv.write_csv(table, dest, write_options=write_options)
 
-    # Hard-coded store ID & path (for single-store test)
-    store_id = "6045"
-    folder_path = LOCAL_UNZIPPED_BASE
+def report_shard_path(store_id):
+    """Path of the CSV shard holding `store_id`'s report rows."""
+    return f"{REPORT_PATH}.part.{store_id}"
 
-    df_store = process_store_data(store_id, folder_path)
+def process_store_folder(store_folder, month_prefix=None):
+    """
+    Process-pool entry point: unpacks a (store_id, folder_path) pair, runs
+    process_store_data on it and writes the rows (no header) to a CSV shard
+    next to REPORT_PATH. Returns the shard path, or None if there were no rows.
+    """
+    store_id, folder_path = store_folder
+    df_store = process_store_data(store_id, folder_path, month_prefix)
     if df_store.empty:
-        final_df = pd.DataFrame(columns=["Astoreid","Storename","date","Type","sale_amount","sale_count","currency"])
-    else:
-        final_df = df_store
+        return None
+
+    shard_path = report_shard_path(store_id)
+    write_report_csv(df_store, shard_path, header=False)
+    return shard_path
+
+def main():
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
 
-    # Optional: filter by current month
+    # Optional: filter by current month (applied inside each store's processing)
     current_year = os.environ.get("YEAR")
     current_month = os.environ.get("MONTH")
-    if current_year and current_month and "date" in final_df.columns:
-        final_df["date"] = final_df["date"].astype(str)
-        prefix = f"{current_year}-{current_month}"
-        final_df = final_df[final_df["date"].str.startswith(prefix)]
+    month_prefix = f"{current_year}-{current_month}" if current_year and current_month else None
+    process_store = partial(process_store_folder, month_prefix=month_prefix)
+
+    # Stores are independent, so each one is processed in its own worker,
+    # which also writes that store's CSV shard. Here the shards are only
+    # appended byte for byte after a single header row, in store order.
+    # The report is built under a temporary name and only replaces the
+    # previous one once every store has succeeded.
+    tmp_report = REPORT_PATH + ".tmp"
+    max_workers = max(1, min(len(STORE_FOLDERS), os.cpu_count() or 1))
+    try:
+        with open(tmp_report, "wb") as f, ProcessPoolExecutor(max_workers=max_workers) as ex:
+            write_report_csv(EMPTY_REPORT, f)
+            for shard_path in ex.map(process_store, STORE_FOLDERS):
+                if shard_path is None:
+                    continue
+                with open(shard_path, "rb") as shard:
+                    shutil.copyfileobj(shard, f, length=1 << 20)
+        os.replace(tmp_report, REPORT_PATH)
+    finally:
+        # Also drops shards that other workers wrote before a store failed
+        for path in [tmp_report] + [report_shard_path(store_id) for store_id, _ in STORE_FOLDERS]:
+            if os.path.exists(path):
+                os.remove(path)
 
-    final_df.to_csv(REPORT_PATH, index=False)
     print(f"Monthly Sales Report generated at: {REPORT_PATH}")
 
 if __name__ == "__main__":